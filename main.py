@@ -23,35 +23,38 @@ MIN_MAP_COLS = 20
 MIN_MAP_ROWS = 10
 
 
-def _float_arg(name, default):
-    token = f"--{name}="
-    for arg in sys.argv:
-        if arg.startswith(token):
-            try:
-                return float(arg.split("=", 1)[1])
-            except ValueError:
-                return float(default)
-    return float(default)
-
-
-def _int_arg(name, default):
-    token = f"--{name}="
-    for arg in sys.argv:
-        if arg.startswith(token):
-            try:
-                return int(arg.split("=", 1)[1])
-            except ValueError:
-                return int(default)
-    return int(default)
+def _parse_args():
+    """Collect --name=value tokens from sys.argv in one pass (last wins)."""
+    parsed = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, _, value = arg[2:].partition("=")
+            parsed[name] = value
+    return parsed
+
+
+def _float_arg(args, name, default):
+    try:
+        return float(args.get(name, default))
+    except ValueError:
+        return float(default)
+
+
+def _int_arg(args, name, default):
+    try:
+        return int(args.get(name, default))
+    except ValueError:
+        return int(default)
 
 
 def run_dump_mode():
-    lat = _float_arg("lat", START_LAT)
-    lon = _float_arg("lon", START_LON)
-    zoom = _int_arg("zoom", START_ZOOM)
-    width = _int_arg("width", 160)
-    height = _int_arg("height", 50)
-    aspect = _float_arg("aspect", DEFAULT_CELL_ASPECT)
+    args = _parse_args()
+    lat = _float_arg(args, "lat", START_LAT)
+    lon = _float_arg(args, "lon", START_LON)
+    zoom = _int_arg(args, "zoom", START_ZOOM)
+    width = _int_arg(args, "width", 160)
+    height = _int_arg(args, "height", 50)
+    aspect = _float_arg(args, "aspect", DEFAULT_CELL_ASPECT)
     result = ascii_map.render_ascii(
         lat=lat,
         lon=lon,
@@ -60,6 +63,7 @@ def run_dump_mode():
         height=height,
         cell_aspect=aspect,
         show_street_names=True,
+        prefetch=False,
     )
     with open("map.txt", "w") as f:
         f.write(result["text"] + "\n")
@@ -128,10 +132,11 @@ def init_color_attrs():
     return attrs, ui
 
 
-def _safe_add(stdscr, y, x, text, limit, attr=0):
+def _safe_add(stdscr, y, x, text, limit, max_y, max_x, attr=0):
+    # max_y/max_x are read once per frame by the caller; querying ncurses
+    # here made every painted segment pay a getmaxyx round-trip.
     if limit <= 0:
         return
-    max_y, max_x = stdscr.getmaxyx()
     if y < 0 or y >= max_y or x < 0 or x >= max_x:
         return
     max_len = min(limit, max_x - x)
@@ -143,29 +148,56 @@ def _safe_add(stdscr, y, x, text, limit, attr=0):
         pass
 
 
-def draw_colored_line(stdscr, y, x_offset, line, max_cols, char_attrs):
+def build_attr_lut(char_attrs):
+    """Map ASCII codepoints straight to curses attributes.
+
+    The map body is ASCII only, so a 128-entry list replaces a dict
+    lookup per character while scanning for color runs.
+    """
+    lut = [0] * 128
+    for ch, attr in char_attrs.items():
+        code = ord(ch)
+        if code < 128:
+            lut[code] = attr
+    return lut
+
+
+def draw_colored_line(stdscr, y, x_offset, line, max_cols, max_y, max_x, attr_lut):
+    raw = line.encode("ascii", "replace")
+    line_len = min(len(raw), max_cols)
+    if line_len <= 0 or y < 0 or y >= max_y:
+        return
+    # Write the glyphs once, then overlay attributes per run with chgat,
+    # which touches attributes only instead of re-rendering glyphs.
+    _safe_add(stdscr, y, x_offset, line, line_len, max_y, max_x)
     x = 0
-    line_len = min(len(line), max_cols)
     while x < line_len:
-        ch = line[x]
-        attr = char_attrs.get(ch, 0)
+        attr = attr_lut[raw[x]]
         run_start = x
         x += 1
-        while x < line_len and char_attrs.get(line[x], 0) == attr:
+        while x < line_len and attr_lut[raw[x]] == attr:
             x += 1
-        segment = line[run_start:x]
-        _safe_add(stdscr, y, x_offset + run_start, segment, len(segment), attr)
+        if not attr:
+            continue
+        start = x_offset + run_start
+        if start >= max_x:
+            break
+        run = min(x - run_start, max_x - start)
+        try:
+            stdscr.chgat(y, start, run, attr)
+        except curses.error:
+            pass
 
 
-def draw_frame(stdscr, top, left, width, height, attr=0):
+def draw_frame(stdscr, top, left, width, height, max_y, max_x, attr=0):
     if width < 2 or height < 2:
         return
     horizontal = "-" * max(0, width - 2)
-    _safe_add(stdscr, top, left, f"+{horizontal}+", width, attr)
+    _safe_add(stdscr, top, left, f"+{horizontal}+", width, max_y, max_x, attr)
     for y in range(top + 1, top + height - 1):
-        _safe_add(stdscr, y, left, "|", 1, attr)
-        _safe_add(stdscr, y, left + width - 1, "|", 1, attr)
-    _safe_add(stdscr, top + height - 1, left, f"+{horizontal}+", width, attr)
+        _safe_add(stdscr, y, left, "|", 1, max_y, max_x, attr)
+        _safe_add(stdscr, y, left + width - 1, "|", 1, max_y, max_x, attr)
+    _safe_add(stdscr, top + height - 1, left, f"+{horizontal}+", width, max_y, max_x, attr)
 
 
 def geocode(query):
@@ -199,7 +231,7 @@ def search_prompt(stdscr, ui_attrs):
     while True:
         # Draw prompt bar
         bar = (prompt_text + query).ljust(width - 1)
-        _safe_add(stdscr, prompt_y, 0, bar, width, ui_attrs.get("hint", curses.A_BOLD))
+        _safe_add(stdscr, prompt_y, 0, bar, width, height, width, ui_attrs.get("hint", curses.A_BOLD))
         stdscr.move(prompt_y, min(len(prompt_text) + len(query), width - 1))
         stdscr.refresh()
 
@@ -229,6 +261,7 @@ def main(stdscr):
     stdscr.timeout(30)
     stdscr.keypad(True)
     char_attrs, ui_attrs = init_color_attrs()
+    attr_lut = build_attr_lut(char_attrs)
 
     lat = START_LAT
     lon = START_LON
@@ -236,6 +269,10 @@ def main(stdscr):
     cell_aspect = DEFAULT_CELL_ASPECT
     show_street_names = True
     search_status = ""
+    last_render_key = None
+    last_rendered = None
+    last_search_status = None
+    last_ui_size = None
 
     while True:
         height, width = stdscr.getmaxyx()
@@ -262,9 +299,10 @@ def main(stdscr):
                 search_status = f"Searching: {query}..."
                 stdscr.erase()
                 _safe_add(stdscr, height // 2, width // 2 - len(search_status) // 2,
-                          search_status, max_cols, ui_attrs.get("hint", 0))
+                          search_status, max_cols, height, width, ui_attrs.get("hint", 0))
                 stdscr.refresh()
                 result = geocode(query)
+                last_ui_size = None  # search overlay erased the screen
                 if result:
                     lat, lon, display_name = result
                     zoom = 13
@@ -284,8 +322,9 @@ def main(stdscr):
 
         if height < 8 or width < 32:
             stdscr.erase()
-            _safe_add(stdscr, 0, 0, "Terminal too small. Resize to at least 32x8. Press q to quit.", max_cols)
+            _safe_add(stdscr, 0, 0, "Terminal too small. Resize to at least 32x8. Press q to quit.", max_cols, height, width)
             stdscr.refresh()
+            last_ui_size = None
             continue
 
         header_rows = 2
@@ -297,47 +336,70 @@ def main(stdscr):
         map_cols = max(1, frame_width - 2)
         map_height = max(1, frame_height - 2)
 
-        rendered = ascii_map.render_ascii(
-            lat=lat,
-            lon=lon,
-            zoom=zoom,
-            width=max(MIN_MAP_COLS, map_cols),
-            height=max(MIN_MAP_ROWS, map_height),
-            cell_aspect=cell_aspect,
-            show_street_names=show_street_names,
-        )
+        # Rendering at ~33 Hz when nothing changed is pure waste: reuse
+        # the previous frame when the view state is identical, and skip
+        # the repaint entirely when no key arrived either.
+        render_key = (lat, lon, zoom, map_cols, map_height, cell_aspect, show_street_names)
+        if key == -1 and render_key == last_render_key and search_status == last_search_status:
+            continue
+
+        if render_key == last_render_key and last_rendered is not None:
+            rendered = last_rendered
+        else:
+            rendered = ascii_map.render_ascii(
+                lat=lat,
+                lon=lon,
+                zoom=zoom,
+                width=max(MIN_MAP_COLS, map_cols),
+                height=max(MIN_MAP_ROWS, map_height),
+                cell_aspect=cell_aspect,
+                show_street_names=show_street_names,
+            )
         lat, lon, zoom = rendered["lat"], rendered["lon"], rendered["zoom"]
+        last_render_key = (lat, lon, zoom, map_cols, map_height, cell_aspect, show_street_names)
+        last_rendered = rendered
+        last_search_status = search_status
+
+        # Static chrome (title, hints, frame, legend) only needs repainting
+        # when the terminal geometry changes; every drawn row below covers
+        # its full width, so no erase is needed in the steady state.
+        full_redraw = last_ui_size != (height, width)
+        if full_redraw:
+            stdscr.erase()
+            last_ui_size = (height, width)
 
-        stdscr.erase()
         title = f"{APP_TITLE}"
         meta = (
             f"lat {lat:.5f}  lon {lon:.5f}  zoom {zoom}  aspect {cell_aspect:.2f}  "
             f"view {rendered['width']}x{rendered['height']}"
         )
-        _safe_add(stdscr, 0, 0, title.ljust(max_cols), max_cols, ui_attrs["title"])
-        _safe_add(stdscr, 0, min(len(title) + 2, max_cols - 1), meta, max_cols, ui_attrs["meta"])
-        _safe_add(
-            stdscr,
-            1,
-            0,
-            "WSAD/Arrows pan  +/- zoom  / search  [ ] aspect  n names  r reset  q quit".ljust(max_cols),
-            max_cols,
-            ui_attrs["hint"],
-        )
-
-        draw_frame(stdscr, frame_top, frame_left, frame_width, frame_height, ui_attrs["border"])
-        _safe_add(stdscr, frame_top, 2, "[ MAP ]", max(0, frame_width - 4), ui_attrs["hint"])
-
-        lines = rendered["text"].splitlines()
+        if full_redraw:
+            _safe_add(stdscr, 0, 0, title.ljust(max_cols), max_cols, height, width, ui_attrs["title"])
+            _safe_add(
+                stdscr,
+                1,
+                0,
+                "WSAD/Arrows pan  +/- zoom  / search  [ ] aspect  n names  r reset  q quit".ljust(max_cols),
+                max_cols,
+                height,
+                width,
+                ui_attrs["hint"],
+            )
+            draw_frame(stdscr, frame_top, frame_left, frame_width, frame_height, height, width, ui_attrs["border"])
+            _safe_add(stdscr, frame_top, 2, "[ MAP ]", max(0, frame_width - 4), height, width, ui_attrs["hint"])
+        _safe_add(stdscr, 0, min(len(title) + 2, max_cols - 1), meta.ljust(max_cols), max_cols, height, width, ui_attrs["meta"])
+
+        lines = rendered["lines"]
         for y, line in enumerate(lines):
             screen_y = frame_top + 1 + y
             if screen_y >= frame_top + frame_height - 1:
                 break
-            draw_colored_line(stdscr, screen_y, frame_left + 1, line, map_cols, char_attrs)
+            draw_colored_line(stdscr, screen_y, frame_left + 1, line, map_cols, height, width, attr_lut)
 
         legend_y = frame_top + frame_height
         status_y = legend_y + 1
-        _safe_add(stdscr, legend_y, 0, ascii_map.GLYPH_LEGEND.ljust(max_cols), max_cols, ui_attrs["meta"])
+        if full_redraw:
+            _safe_add(stdscr, legend_y, 0, ascii_map.GLYPH_LEGEND.ljust(max_cols), max_cols, height, width, ui_attrs["meta"])
         status_text = (
             f"Zoom range {ascii_map.MIN_ZOOM}-{ascii_map.MAX_ZOOM}  "
             f"Street names {'on' if show_street_names else 'off'}  "
@@ -351,6 +413,8 @@ def main(stdscr):
             0,
             status_text.ljust(max_cols),
             max_cols,
+            height,
+            width,
             ui_attrs["meta"],
         )
         stdscr.refresh()
@@ -1,5 +1,7 @@
+import concurrent.futures
+import functools
 import math
-from collections import OrderedDict
+import threading
 
 from maps import coords, render, tiles
 
@@ -66,30 +68,143 @@ GREEN_LANDUSE_CLASSES = {
 }
 GLYPH_LEGEND = "' green  ~ water  | waterway  # bldg  =-+;:.%x,` roads  @ center"
 
-_tile_cache = OrderedDict()
 
-
-def _cache_put(key, value):
-    _tile_cache[key] = value
-    _tile_cache.move_to_end(key)
-    if len(_tile_cache) > MAX_TILE_CACHE:
-        _tile_cache.popitem(last=False)
+_prefetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+_prefetch_inflight = set()
 
 
 def tile_cache_size():
-    return len(_tile_cache)
+    return _decoded_tile.cache_info().currsize
+
+
+def _simplify_points(points):
+    # Uniform index sampling down to MAX_GEOM_POINTS; both endpoints are
+    # always kept, so no fix-up append is needed afterwards. Callers
+    # check the length threshold before calling.
+    last = len(points) - 1
+    span = MAX_GEOM_POINTS - 1
+    return [points[(i * last) // span] for i in range(MAX_GEOM_POINTS)]
+
+
+def _scale_geometry(gtype, coordinates, scale, zoom):
+    # Simplification is deterministic per (tile, zoom), so it happens
+    # here, once per cached tile, rather than on every frame. The length
+    # guard lives at the call site so short geometry (the vast majority)
+    # skips the helper entirely.
+    simplify = zoom >= GEOM_SIMPLIFY_ZOOM
+
+    def thin(points):
+        if simplify and len(points) > MAX_GEOM_POINTS:
+            return _simplify_points(points)
+        return points
+
+    if gtype == "Polygon":
+        return [
+            [(x * scale, y * scale) for x, y in thin(ring)]
+            for ring in coordinates
+        ]
+    if gtype == "MultiPolygon":
+        return [
+            [[(x * scale, y * scale) for x, y in thin(ring)] for ring in polygon]
+            for polygon in coordinates
+        ]
+    if gtype == "LineString":
+        return [(x * scale, y * scale) for x, y in thin(coordinates)]
+    if gtype == "MultiLineString":
+        return [
+            [(x * scale, y * scale) for x, y in thin(line)]
+            for line in coordinates
+        ]
+    if gtype == "Point":
+        return (coordinates[0] * scale, coordinates[1] * scale)
+    if gtype == "MultiPoint":
+        return [(x * scale, y * scale) for x, y in coordinates]
+    return None
+
+
+def _geometry_bbox(gtype, coordinates):
+    if gtype == "Polygon" or gtype == "MultiLineString":
+        points = [pt for part in coordinates for pt in part]
+    elif gtype == "MultiPolygon":
+        points = [pt for polygon in coordinates for ring in polygon for pt in ring]
+    elif gtype == "LineString" or gtype == "MultiPoint":
+        points = coordinates
+    elif gtype == "Point":
+        points = [coordinates]
+    else:
+        points = []
+    if not points:
+        return None
+    xs = [pt[0] for pt in points]
+    ys = [pt[1] for pt in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _prepare_tile(decoded, zoom):
+    """Convert decoded MVT layers into render-ready layers.
+
+    Coordinates are rescaled from extent units to tile-local pixels and
+    simplified once at cache-fill time, so per-frame drawing never
+    touches the layer extent or the point budget again. The same tile is
+    typically rendered for many frames, so this work amortizes to zero.
+    """
+    prepared = {}
+    for name, layer in decoded.items():
+        extent = layer.get("extent") or 4096
+        scale = TILE_SIZE / extent
+        features = []
+        for feature in layer["features"]:
+            geo = feature["geometry"]
+            scaled = _scale_geometry(geo["type"], geo["coordinates"], scale, zoom)
+            if scaled is None:
+                continue
+            features.append(
+                {
+                    "geometry": {"type": geo["type"], "coordinates": scaled},
+                    "properties": feature.get("properties", {}),
+                    "bbox": _geometry_bbox(geo["type"], scaled),
+                }
+            )
+        prepared[name] = {"features": features}
+    return prepared
+
+
+@functools.lru_cache(maxsize=MAX_TILE_CACHE)
+def _decoded_tile(z, x, y):
+    raw = tiles.fetch_tile(z, x, y)
+    decoded = tiles.decode_tile(raw, z, x, y) if raw else {}
+    return _prepare_tile(decoded, z) if decoded else {}
 
 
 def get_decoded_tile(z, x, y):
-    key = (z, x, y)
-    if key in _tile_cache:
-        _tile_cache.move_to_end(key)
-        return _tile_cache[key]
+    return _decoded_tile(z, x, y)
 
-    raw = tiles.fetch_tile(z, x, y)
-    decoded = tiles.decode_tile(raw, z, x, y) if raw else {}
-    _cache_put(key, decoded)
-    return decoded
+
+def _prefetch_one(key):
+    try:
+        get_decoded_tile(*key)
+    finally:
+        _prefetch_inflight.discard(key)
+
+
+def _prefetch_ring(zoom, min_tx, max_tx, min_ty, max_ty, world_tiles):
+    """Warm the cache with the ring of tiles just outside the viewport.
+
+    Panning by a few cells usually pulls in one of these, so fetching and
+    decoding them in the background turns the next pan into a cache hit
+    instead of a blocking network round-trip inside the render loop.
+    """
+    for tx in range(min_tx - 1, max_tx + 2):
+        for ty in range(min_ty - 1, max_ty + 2):
+            if min_tx <= tx <= max_tx and min_ty <= ty <= max_ty:
+                continue
+            if ty < 0 or ty >= world_tiles:
+                continue
+            key = (zoom, tx % world_tiles, ty)
+            if key in _prefetch_inflight:
+                continue
+            _prefetch_inflight.add(key)
+            _prefetch_pool.submit(_prefetch_one, key)
 
 
 def normalize_view(lat, lon, zoom):
@@ -102,26 +217,48 @@ def normalize_view(lat, lon, zoom):
     return lat, lon, zoom, wx, wy, world_size
 
 
-def pan(lat, lon, zoom, direction, step_cells=DEFAULT_PAN_STEP_CELLS, cell_aspect=DEFAULT_CELL_ASPECT):
+_PAN_DELTAS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+
+def pan_delta(lat, lon, zoom, dx, dy, step_cells=DEFAULT_PAN_STEP_CELLS, cell_aspect=DEFAULT_CELL_ASPECT):
+    """Pan by dx/dy steps (one step = one pan action) in a single move.
+
+    Equivalent to abs(dx) + abs(dy) chained pan() calls, but the view is
+    normalized and converted back to lat/lon once; the web app coalesces
+    held-key input into one of these.
+    """
     lat, lon, zoom, wx, wy, world_size = normalize_view(lat, lon, zoom)
-    move_x = step_cells * max(0.2, float(cell_aspect))
-    move_y = step_cells * WORLD_PX_PER_CELL_Y
-
-    if direction == "up":
-        wy -= move_y
-    elif direction == "down":
-        wy += move_y
-    elif direction == "left":
-        wx -= move_x
-    elif direction == "right":
-        wx += move_x
+    wx += dx * step_cells * max(0.2, float(cell_aspect))
+    wy += dy * step_cells * WORLD_PX_PER_CELL_Y
 
     wx = wx % world_size
     wy = max(0.0, min(wy, float(world_size - 1)))
     return coords.world_pixel_to_latlon(wx, wy, zoom, tile_size=TILE_SIZE)
 
 
-def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT, show_street_names=False):
+def pan(lat, lon, zoom, direction, step_cells=DEFAULT_PAN_STEP_CELLS, cell_aspect=DEFAULT_CELL_ASPECT):
+    dx, dy = _PAN_DELTAS.get(direction, (0, 0))
+    return pan_delta(lat, lon, zoom, dx, dy, step_cells=step_cells, cell_aspect=cell_aspect)
+
+
+# One framebuffer per thread, reused across frames: with dirty-box
+# clearing in render.Framebuffer, a pan repaints only what the last
+# frame drew instead of reallocating the whole grid. Thread-local
+# because the web app renders from several handler threads at once.
+_thread_fbs = threading.local()
+
+
+def _get_framebuffer(width, height):
+    fb = getattr(_thread_fbs, "fb", None)
+    if fb is None or fb.width != width or fb.height != height:
+        fb = render.Framebuffer(width, height)
+        _thread_fbs.fb = fb
+    else:
+        fb.clear()
+    return fb
+
+
+def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT, show_street_names=False, prefetch=True):
     width = max(20, min(int(width), 320))
     height = max(10, min(int(height), 140))
     cell_aspect = max(0.2, min(float(cell_aspect), 2.0))
@@ -133,27 +270,51 @@ def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT,
     tl_wy = cam_wy - view_world_h / 2
 
     world_tiles = 2**zoom
-    fb = render.Framebuffer(width, height)
-    street_label_candidates = [] if show_street_names else None
+    fb = _get_framebuffer(width, height)
+    street_label_candidates = {} if show_street_names else None
+    # Divisions in the per-point transforms become multiplications by
+    # precomputed reciprocals; both are loop-invariant for the frame.
+    inv_cell_x = 1.0 / cell_aspect
+    inv_cell_y = 1.0 / WORLD_PX_PER_CELL_Y
 
     def world_to_screen(wx, wy):
-        sx = int((wx - tl_wx) / cell_aspect)
-        sy = int((wy - tl_wy) / WORLD_PX_PER_CELL_Y)
+        sx = int((wx - tl_wx) * inv_cell_x)
+        sy = int((wy - tl_wy) * inv_cell_y)
         return sx, sy
 
-    def tile_point_to_screen(tx, ty, pt, extent):
-        wx = tx * TILE_SIZE + (pt[0] / extent * TILE_SIZE)
-        wy = ty * TILE_SIZE + (pt[1] / extent * TILE_SIZE)
+    def tile_point_to_screen(tx, ty, pt):
+        wx = tx * TILE_SIZE + pt[0]
+        wy = ty * TILE_SIZE + pt[1]
         return world_to_screen(wx, wy)
 
-    def simplify_points(points):
-        if zoom < GEOM_SIMPLIFY_ZOOM or len(points) <= MAX_GEOM_POINTS:
-            return points
-        step = max(2, math.ceil(len(points) / MAX_GEOM_POINTS))
-        sampled = points[::step]
-        if sampled[-1] != points[-1]:
-            sampled.append(points[-1])
-        return sampled
+    def feature_on_screen(feature):
+        # Cheap AABB cull: tile geometry regularly spills past the
+        # viewport, so reject whole features before touching their
+        # point lists.
+        bbox = feature.get("bbox")
+        if bbox is None:
+            return True
+        ox = tx * TILE_SIZE - tl_wx
+        oy = ty * TILE_SIZE - tl_wy
+        if (ox + bbox[2]) * inv_cell_x < 0 or (ox + bbox[0]) * inv_cell_x >= width:
+            return False
+        if (oy + bbox[3]) * inv_cell_y < 0 or (oy + bbox[1]) * inv_cell_y >= height:
+            return False
+        return True
+
+    def project_points(points):
+        # Batch transform of tile-local pixel points to screen cells.
+        # Coordinates were rescaled to pixels at cache-fill time, so only
+        # the per-tile translation remains here.
+        ox = tx * TILE_SIZE - tl_wx
+        oy = ty * TILE_SIZE - tl_wy
+        return [
+            (
+                int((ox + pt[0]) * inv_cell_x),
+                int((oy + pt[1]) * inv_cell_y),
+            )
+            for pt in points
+        ]
 
     def normalize_label_text(raw):
         if raw is None:
@@ -166,73 +327,65 @@ def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT,
             text = text[: MAX_LABEL_LEN - 3] + "..."
         return text
 
-    def draw_polygon_layer(tile_data, layer_name, char, filled):
-        if layer_name not in tile_data:
+    def projected_polygons(geo):
+        gtype = geo["type"]
+        if gtype == "Polygon":
+            polygons = [geo["coordinates"]]
+        elif gtype == "MultiPolygon":
+            polygons = geo["coordinates"]
+        else:
             return
-        layer = tile_data[layer_name]
-        extent = layer["extent"]
-        for feature in layer["features"]:
-            geo = feature["geometry"]
-            gtype = geo["type"]
-            if gtype == "Polygon":
-                polygons = [geo["coordinates"]]
-            elif gtype == "MultiPolygon":
-                polygons = geo["coordinates"]
-            else:
-                continue
-
-            for polygon in polygons:
-                rings = []
-                for ring in polygon:
-                    simplified_ring = simplify_points(ring)
-                    points = [tile_point_to_screen(tx, ty, pt, extent) for pt in simplified_ring]
-                    if len(points) >= 3:
-                        rings.append(points)
-                if not rings:
-                    continue
-                if filled:
-                    fb.draw_polygon_filled(rings, char, 0)
-                else:
-                    for ring in rings:
-                        fb.draw_poly_outline(ring, char, 0)
-
-    def draw_green_layer(tile_data):
-        layer = tile_data.get("landuse") or tile_data.get("landcover")
-        if not layer:
+        for polygon in polygons:
+            rings = []
+            for ring in polygon:
+                points = project_points(ring)
+                if len(points) >= 3:
+                    rings.append(points)
+            if rings:
+                yield rings
+
+    def draw_green_features(layer):
+        if zoom > TERRAIN_FILL_MAX_ZOOM:
             return
-        extent = layer["extent"]
         for feature in layer["features"]:
             props = feature.get("properties", {})
             if props.get("class") not in GREEN_LANDUSE_CLASSES:
                 continue
+            if not feature_on_screen(feature):
+                continue
+            for rings in projected_polygons(feature["geometry"]):
+                fb.draw_polygon_filled(rings, GLYPH_GREEN, 0)
 
-            geo = feature["geometry"]
-            gtype = geo["type"]
-            if gtype == "Polygon":
-                polygons = [geo["coordinates"]]
-            elif gtype == "MultiPolygon":
-                polygons = geo["coordinates"]
-            else:
+    def draw_water_features(layer):
+        # Fill and outline come from the same projected rings, so one
+        # walk over the layer covers both passes.
+        fill = zoom <= TERRAIN_FILL_MAX_ZOOM
+        for feature in layer["features"]:
+            if not feature_on_screen(feature):
                 continue
+            for rings in projected_polygons(feature["geometry"]):
+                if fill:
+                    fb.draw_polygon_filled(rings, GLYPH_WATER, 0)
+                for ring in rings:
+                    fb.draw_poly_outline(ring, GLYPH_WATER, 0)
 
-            for polygon in polygons:
-                rings = []
-                for ring in polygon:
-                    simplified_ring = simplify_points(ring)
-                    points = [tile_point_to_screen(tx, ty, pt, extent) for pt in simplified_ring]
-                    if len(points) >= 3:
-                        rings.append(points)
-                if rings:
-                    fb.draw_polygon_filled(rings, GLYPH_GREEN, 0)
+    def draw_building_features(layer):
+        for feature in layer["features"]:
+            if not feature_on_screen(feature):
+                continue
+            for rings in projected_polygons(feature["geometry"]):
+                for ring in rings:
+                    fb.draw_poly_outline(ring, GLYPH_BUILDING, 0)
 
     def draw_line_layer(layer, class_to_char, default_char):
-        extent = layer["extent"]
         for feature in layer["features"]:
             geo = feature["geometry"]
             props = feature.get("properties", {})
             char = class_to_char.get(props.get("class", ""), default_char)
             if char == " ":
                 continue
+            if not feature_on_screen(feature):
+                continue
             if geo["type"] == "LineString":
                 lines = [geo["coordinates"]]
             elif geo["type"] == "MultiLineString":
@@ -241,21 +394,12 @@ def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT,
                 continue
 
             for line in lines:
-                simplified_line = simplify_points(line)
-                points = [tile_point_to_screen(tx, ty, pt, extent) for pt in simplified_line]
+                points = project_points(line)
                 if len(points) >= 2:
                     fb.draw_poly_outline(points, char, 0)
 
-    def collect_street_label_candidates(tile_data, out_candidates):
-        if zoom < LABEL_MIN_ZOOM:
-            return
-        layer = tile_data.get("transportation_name")
-        if not layer:
-            return
-        extent = layer.get("extent")
-        if not extent:
-            return
-
+    def collect_street_label_candidates(layer):
+        out_candidates = street_label_candidates
         for feature in layer.get("features", []):
             props = feature.get("properties", {})
             road_class = props.get("class")
@@ -278,41 +422,48 @@ def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT,
             for line in lines:
                 if len(line) < 2:
                     continue
-                simplified_line = simplify_points(line)
-                if not simplified_line:
-                    continue
-                mid = simplified_line[len(simplified_line) // 2]
-                sx, sy = tile_point_to_screen(tx, ty, mid, extent)
+                mid = line[len(line) // 2]
+                sx, sy = tile_point_to_screen(tx, ty, mid)
                 if sx < 0 or sx >= width or sy < 0 or sy >= height:
                     continue
-                out_candidates.append((ROAD_LABEL_PRIORITY[road_class], sy, sx, text))
-                if len(out_candidates) >= MAX_LABEL_CANDIDATES:
-                    return
+                # Popular names repeat across tiles; keep one candidate
+                # per text (best priority) so the placement sort stays
+                # small and the dedup happens before sorting, not after.
+                priority = ROAD_LABEL_PRIORITY[road_class]
+                existing = out_candidates.get(text)
+                if existing is None:
+                    if len(out_candidates) >= MAX_LABEL_CANDIDATES:
+                        return
+                    out_candidates[text] = (priority, sy, sx)
+                elif priority < existing[0]:
+                    out_candidates[text] = (priority, sy, sx)
 
     def draw_street_labels(candidates):
         if not candidates:
             return
         max_labels = max(10, min(48, width // 4 + height // 3))
-        occupied = [[False for _ in range(width)] for _ in range(height)]
-        placed_names = set()
+        # Flat bytearray occupancy grid: the blocked test and the claim
+        # become per-row slice operations instead of nested Python loops.
+        occupied = bytearray(width * height)
         placed = 0
 
-        for _, y, x, text in sorted(candidates, key=lambda item: (item[0], item[1], item[2])):
-            if text in placed_names:
-                continue
+        ordered = sorted(candidates.items(), key=lambda item: (item[1], item[0]))
+        for text, (_, y, x) in ordered:
             label_len = len(text)
             start_x = x - (label_len // 2)
             end_x = start_x + label_len - 1
             if start_x < 1 or end_x >= width - 1 or y < 1 or y >= height - 1:
                 continue
 
+            pad_x0 = max(0, start_x - 1)
+            pad_x1 = min(width, end_x + 2)
+            pad_y0 = max(0, y - 1)
+            pad_y1 = min(height, y + 2)
             blocked = False
-            for oy in range(max(0, y - 1), min(height, y + 2)):
-                for ox in range(max(0, start_x - 1), min(width, end_x + 2)):
-                    if occupied[oy][ox]:
-                        blocked = True
-                        break
-                if blocked:
+            for oy in range(pad_y0, pad_y1):
+                row = oy * width
+                if any(occupied[row + pad_x0 : row + pad_x1]):
+                    blocked = True
                     break
             if blocked:
                 continue
@@ -323,14 +474,37 @@ def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT,
                 fb.set_char(start_x - 1, y, " ", 0)
             if end_x + 1 < width:
                 fb.set_char(end_x + 1, y, " ", 0)
-            for oy in range(max(0, y - 1), min(height, y + 2)):
-                for ox in range(max(0, start_x - 1), min(width, end_x + 2)):
-                    occupied[oy][ox] = True
-            placed_names.add(text)
+            claim = b"\x01" * (pad_x1 - pad_x0)
+            for oy in range(pad_y0, pad_y1):
+                row = oy * width
+                occupied[row + pad_x0 : row + pad_x1] = claim
             placed += 1
             if placed >= max_labels:
                 break
 
+    def draw_road_features(layer):
+        draw_line_layer(layer, ROAD_CLASS_TO_CHAR, ROAD_DEFAULT_CHAR)
+
+    def draw_waterway_features(layer):
+        draw_line_layer(layer, {}, GLYPH_WATERWAY)
+
+    # One sweep per tile: walk a fixed draw-order plan and dispatch each
+    # present layer to its handler instead of re-probing the tile dict
+    # once per pass. "landcover" and "transportation" are fallbacks for
+    # "landuse" and "road" respectively, never drawn alongside them.
+    layer_plan = [
+        ("landuse", draw_green_features),
+        ("landcover", draw_green_features),
+        ("water", draw_water_features),
+        ("building", draw_building_features),
+        ("road", draw_road_features),
+        ("transportation", draw_road_features),
+        ("waterway", draw_waterway_features),
+    ]
+    if street_label_candidates is not None and zoom >= LABEL_MIN_ZOOM:
+        layer_plan.append(("transportation_name", collect_street_label_candidates))
+    fallback_of = {"landcover": "landuse", "transportation": "road"}
+
     min_tx = math.floor(tl_wx / TILE_SIZE)
     max_tx = math.floor((tl_wx + view_world_w) / TILE_SIZE)
     min_ty = math.floor(tl_wy / TILE_SIZE)
@@ -346,32 +520,24 @@ def render_ascii(lat, lon, zoom, width, height, cell_aspect=DEFAULT_CELL_ASPECT,
             if not tile_data:
                 continue
 
-            if zoom <= TERRAIN_FILL_MAX_ZOOM:
-                draw_green_layer(tile_data)
-                draw_polygon_layer(tile_data, "water", GLYPH_WATER, filled=True)
-            draw_polygon_layer(tile_data, "water", GLYPH_WATER, filled=False)
-
-            draw_polygon_layer(tile_data, "building", GLYPH_BUILDING, filled=False)
-
-            road_layer = tile_data.get("road") or tile_data.get("transportation")
-            if road_layer:
-                draw_line_layer(
-                    road_layer,
-                    ROAD_CLASS_TO_CHAR,
-                    ROAD_DEFAULT_CHAR,
-                )
-
-            if "waterway" in tile_data:
-                draw_line_layer(tile_data["waterway"], {}, GLYPH_WATERWAY)
-            if street_label_candidates is not None:
-                collect_street_label_candidates(tile_data, street_label_candidates)
+            for layer_name, handler in layer_plan:
+                layer = tile_data.get(layer_name)
+                if not layer:
+                    continue
+                preferred = fallback_of.get(layer_name)
+                if preferred is not None and preferred in tile_data:
+                    continue
+                handler(layer)
 
     if street_label_candidates is not None:
         draw_street_labels(street_label_candidates)
+    if prefetch:
+        _prefetch_ring(zoom, min_tx, max_tx, min_ty, max_ty, world_tiles)
     fb.set_char(width // 2, height // 2, GLYPH_CENTER, 0)
     lines = [fb.get_row(y) for y in range(height)]
     return {
         "text": "\n".join(lines),
+        "lines": lines,
         "lat": lat,
         "lon": lon,
         "zoom": zoom,
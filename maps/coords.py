@@ -4,21 +4,36 @@ import math
 EARTH_RADIUS = 6378137.0
 MAX_LATITUDE = 85.05112878
 
+_TWO_PI = 2.0 * math.pi
+
+# World sizes in pixels, cached per (zoom, tile_size): the converters run
+# once per tile-visibility query and per pan, and the zoom set in play at
+# any time is tiny.
+_scale_cache = {}
+
+def _world_scale(zoom, tile_size):
+    key = (zoom, tile_size)
+    scale = _scale_cache.get(key)
+    if scale is None:
+        scale = tile_size * (2 ** zoom)
+        _scale_cache[key] = scale
+    return scale
+
 def latlon_to_world_pixel(lat, lon, zoom, tile_size=256):
     """
     Converts lat/lon to world pixel coordinates at a given zoom level.
     Returns (px, py).
     """
-    scale = (tile_size * (2 ** zoom))
+    scale = _world_scale(zoom, tile_size)
     
     # Longitude to x
     x = (lon + 180.0) / 360.0 * scale
     
-    # Latitude to y (Mercator)
+    # Latitude to y (Mercator), via the asinh identity already used by
+    # get_tile_coords: one transcendental fewer than the log-ratio form.
     # Clip latitude to valid range
     lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
-    sin_lat = math.sin(lat * math.pi / 180.0)
-    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    y = (0.5 - math.asinh(math.tan(math.radians(lat))) / _TWO_PI) * scale
     
     return x, y
 
@@ -27,7 +42,7 @@ def world_pixel_to_latlon(x, y, zoom, tile_size=256):
     Converts world pixel coordinates to lat/lon.
     Returns (lat, lon).
     """
-    scale = (tile_size * (2 ** zoom))
+    scale = _world_scale(zoom, tile_size)
     
     lon = (x / scale) * 360.0 - 180.0
     
@@ -36,11 +51,54 @@ def world_pixel_to_latlon(x, y, zoom, tile_size=256):
     
     return lat, lon
 
+def latlons_to_world_pixels(points, zoom, tile_size=256):
+    """
+    Converts a list of (lat, lon) pairs to world pixel coordinates.
+    Batch form of latlon_to_world_pixel: the scale and constants are
+    hoisted out of the per-point work.
+    Returns list of (px, py).
+    """
+    scale = _world_scale(zoom, tile_size)
+    inv_360 = scale / 360.0
+    inv_two_pi = scale / _TWO_PI
+    max_lat = MAX_LATITUDE
+    asinh = math.asinh
+    tan = math.tan
+    radians = math.radians
+    return [
+        (
+            (lon + 180.0) * inv_360,
+            0.5 * scale - asinh(tan(radians(max(min(lat, max_lat), -max_lat)))) * inv_two_pi,
+        )
+        for lat, lon in points
+    ]
+
+def world_pixels_to_latlons(points, zoom, tile_size=256):
+    """
+    Converts a list of (x, y) world pixel pairs to lat/lon.
+    Batch form of world_pixel_to_latlon.
+    Returns list of (lat, lon).
+    """
+    scale = _world_scale(zoom, tile_size)
+    inv_scale_360 = 360.0 / scale
+    two_pi_inv_scale = _TWO_PI / scale
+    pi = math.pi
+    deg_per_rad = 180.0 / pi
+    atan = math.atan
+    sinh = math.sinh
+    return [
+        (
+            deg_per_rad * atan(sinh(pi - y * two_pi_inv_scale)),
+            x * inv_scale_360 - 180.0,
+        )
+        for x, y in points
+    ]
+
 def get_tile_coords(lat, lon, zoom):
     """
     Returns the tile (x, y) containing the given lat/lon at zoom.
     """
-    n = 2.0 ** zoom
+    n = _world_scale(zoom, 1)
     xtile = int((lon + 180.0) / 360.0 * n)
     ytile = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
     return xtile, ytile
@@ -48,7 +106,8 @@ def get_tile_coords(lat, lon, zoom):
 def get_visible_tiles(center_lat, center_lon, zoom, width_px, height_px, tile_size=256):
     """
     Calculates the range of tiles visible in the viewport.
-    Returns generator of (z, x, y) tuples.
+    Returns list of (z, x, y) tuples; callers always consume the whole
+    range, so a prebuilt list beats resuming a generator per tile.
     """
     center_x, center_y = latlon_to_world_pixel(center_lat, center_lon, zoom, tile_size)
     
@@ -64,7 +123,9 @@ def get_visible_tiles(center_lat, center_lon, zoom, width_px, height_px, tile_si
     
     # Handle wrapping logic if needed (not strictly for MVP unless crossing dateline)
     # For now, simple range
-    
-    for x in range(min_tile_x, max_tile_x + 1):
-        for y in range(min_tile_y, max_tile_y + 1):
-            yield (zoom, x, y)
+
+    return [
+        (zoom, x, y)
+        for x in range(min_tile_x, max_tile_x + 1)
+        for y in range(min_tile_y, max_tile_y + 1)
+    ]
@@ -22,11 +22,18 @@ The output dict matches the format expected by ascii_map.py:
     }
 """
 
+import mmap
 import struct
 
 # ── Protobuf wire-format helpers (no external dependency) ────────────────
 
 def _read_varint(buf, pos):
+    # Fast path: most wire varints (tags, lengths, small values) fit in
+    # one byte, so return before setting up the accumulation loop.
+    if pos < len(buf):
+        b = buf[pos]
+        if b < 0x80:
+            return b, pos + 1
     result = 0
     shift = 0
     while True:
@@ -40,13 +47,24 @@ def _read_varint(buf, pos):
         shift += 7
 
 def _read_sint(buf, pos):
+    if pos < len(buf):
+        b = buf[pos]
+        if b < 0x80:
+            return (b >> 1) ^ -(b & 1), pos + 1
     v, pos = _read_varint(buf, pos)
     return (v >> 1) ^ -(v & 1), pos
 
 def _parse_message(buf, start=0, end=None):
-    """Yield (field_number, wire_type, value, raw_bytes) tuples."""
+    """Parse a message into a list of (field_number, wire_type, value, raw_bytes).
+
+    Returns a prebuilt list rather than a generator: every caller walks
+    all fields anyway, and iterating a list skips the per-field generator
+    resume machinery.
+    """
     if end is None:
         end = len(buf)
+    fields = []
+    append = fields.append
     pos = start
     while pos < end:
         tag, pos = _read_varint(buf, pos)
@@ -54,29 +72,51 @@ def _parse_message(buf, start=0, end=None):
         wtype = tag & 0x07
         if wtype == 0:  # varint
             val, pos = _read_varint(buf, pos)
-            yield field, wtype, val, None
+            append((field, wtype, val, None))
         elif wtype == 2:  # length-delimited
             length, pos = _read_varint(buf, pos)
-            yield field, wtype, buf[pos : pos + length], None
+            append((field, wtype, buf[pos : pos + length], None))
             pos += length
-        elif wtype == 5:  # 32-bit
-            yield field, wtype, struct.unpack_from("<f", buf, pos)[0], None
+        elif wtype == 5:  # 32-bit; in MVT only Value.float_value uses this
+            append((field, wtype, buf[pos : pos + 4], None))
             pos += 4
-        elif wtype == 1:  # 64-bit
-            yield field, wtype, struct.unpack_from("<d", buf, pos)[0], None
+        elif wtype == 1:  # 64-bit; in MVT only Value.double_value uses this
+            append((field, wtype, buf[pos : pos + 8], None))
             pos += 8
         else:
             break  # skip unknown wire types
+    return fields
 
 
 def _decode_packed_uint32(buf):
-    """Decode a packed repeated uint32 field."""
+    """Decode a packed repeated uint32 field.
+
+    This runs over every geometry buffer in the tile, so the varint loop
+    is inlined here instead of calling _read_varint per value: most
+    geometry varints fit in one byte and take the early-append path.
+    """
     values = []
+    append = values.append
     pos = 0
     end = len(buf)
     while pos < end:
-        v, pos = _read_varint(buf, pos)
-        values.append(v)
+        b = buf[pos]
+        pos += 1
+        if b < 0x80:
+            append(b)
+            continue
+        result = b & 0x7F
+        shift = 7
+        while True:
+            if pos >= end:
+                raise ValueError("Truncated varint")
+            b = buf[pos]
+            pos += 1
+            if b < 0x80:
+                append(result | (b << shift))
+                break
+            result |= (b & 0x7F) << shift
+            shift += 7
     return values
 
 
@@ -91,45 +131,55 @@ _GEOM_LINESTRING = 2
 _GEOM_POLYGON = 3
 
 
-def _decode_geometry(geom_data, geom_type, extent, y_coord_down):
+def _decode_geometry(geom_data, geom_type):
     """
     Decode MVT geometry commands into GeoJSON-style coordinates.
+
+    Y stays as encoded (increasing downward from the tile origin), which
+    is what the world/tile pixel math in the renderer expects.
     """
     commands = _decode_packed_uint32(geom_data)
+    n = len(commands)
     idx = 0
     cx, cy = 0, 0
     rings = []
     current_ring = []
+    # Command constants as locals: the dispatch below runs once per MVT
+    # command and LOAD_FAST beats LOAD_GLOBAL there.
+    move_to = _CMD_MOVE_TO
+    line_to = _CMD_LINE_TO
+    close_path = _CMD_CLOSE_PATH
 
-    while idx < len(commands):
+    while idx < n:
         cmd_int = commands[idx]
         idx += 1
         cmd_id = cmd_int & 0x07
         cmd_count = cmd_int >> 3
 
-        if cmd_id == _CMD_MOVE_TO:
-            for _ in range(cmd_count):
-                if idx + 1 >= len(commands):
-                    break
-                dx = (commands[idx] >> 1) ^ -(commands[idx] & 1)
-                dy = (commands[idx + 1] >> 1) ^ -(commands[idx + 1] & 1)
-                idx += 2
-                cx += dx
-                cy += dy
-                if current_ring:
-                    rings.append(current_ring)
-                current_ring = [(cx, cy)]
-        elif cmd_id == _CMD_LINE_TO:
-            for _ in range(cmd_count):
-                if idx + 1 >= len(commands):
-                    break
-                dx = (commands[idx] >> 1) ^ -(commands[idx] & 1)
-                dy = (commands[idx + 1] >> 1) ^ -(commands[idx + 1] & 1)
-                idx += 2
-                cx += dx
-                cy += dy
-                current_ring.append((cx, cy))
-        elif cmd_id == _CMD_CLOSE_PATH:
+        if cmd_id == move_to or cmd_id == line_to:
+            # Slice all parameter pairs for the command out at once and
+            # walk them with a paired iterator: zigzag decode plus the
+            # running-coordinate sum run without per-pair index
+            # bookkeeping. A trailing unpaired value is left unconsumed,
+            # matching the old mid-pair truncation behavior.
+            take = min(cmd_count * 2, n - idx) & ~1
+            params = commands[idx : idx + take]
+            idx += take
+            it = iter(params)
+            if cmd_id == line_to:
+                append = current_ring.append
+                for rx, ry in zip(it, it):
+                    cx += (rx >> 1) ^ -(rx & 1)
+                    cy += (ry >> 1) ^ -(ry & 1)
+                    append((cx, cy))
+            else:
+                for rx, ry in zip(it, it):
+                    cx += (rx >> 1) ^ -(rx & 1)
+                    cy += (ry >> 1) ^ -(ry & 1)
+                    if current_ring:
+                        rings.append(current_ring)
+                    current_ring = [(cx, cy)]
+        elif cmd_id == close_path:
             if current_ring and len(current_ring) >= 2:
                 current_ring.append(current_ring[0])
             if current_ring:
@@ -139,10 +189,6 @@ def _decode_geometry(geom_data, geom_type, extent, y_coord_down):
     if current_ring:
         rings.append(current_ring)
 
-    if not y_coord_down:
-        # Flip Y so it goes up (standard GeoJSON convention)
-        rings = [[(x, extent - y) for x, y in ring] for ring in rings]
-
     # Format output based on geometry type
     if geom_type == _GEOM_POINT:
         points = []
@@ -185,13 +231,16 @@ def _decode_geometry(geom_data, geom_type, extent, y_coord_down):
 
 
 def _signed_area(ring):
-    """Compute signed area of a ring (shoelace formula)."""
+    """Compute signed area of a ring (shoelace formula).
+
+    Walks consecutive vertex pairs starting from the closing edge, so
+    there is no modulo indexing or tuple subscripting per vertex.
+    """
+    x0, y0 = ring[-1]
     area = 0
-    n = len(ring)
-    for i in range(n):
-        j = (i + 1) % n
-        area += ring[i][0] * ring[j][1]
-        area -= ring[j][0] * ring[i][1]
+    for x1, y1 in ring:
+        area += x0 * y1 - x1 * y0
+        x0, y0 = x1, y1
     return area / 2.0
 
 
@@ -221,15 +270,52 @@ _VALUE_SINT = 6
 _VALUE_BOOL = 7
 
 
+def _decode_tags(tags_raw, keys, values, properties):
+    """Decode packed key/value index pairs straight from the tag bytes.
+
+    Walking the varint pairs in place avoids materializing a temporary
+    index list per feature (one-byte varints are the overwhelmingly
+    common case and are read inline).
+    """
+    pos = 0
+    end = len(tags_raw)
+    len_keys = len(keys)
+    len_values = len(values)
+    while pos < end:
+        b = tags_raw[pos]
+        if b < 0x80:
+            ki = b
+            pos += 1
+        else:
+            ki, pos = _read_varint(tags_raw, pos)
+        if pos >= end:
+            break
+        b = tags_raw[pos]
+        if b < 0x80:
+            vi = b
+            pos += 1
+        else:
+            vi, pos = _read_varint(tags_raw, pos)
+        if ki < len_keys and vi < len_values:
+            properties[keys[ki]] = values[vi]
+
+
 def _decode_value(data):
     """Decode a protobuf Value message."""
+    # Nearly all MVT property values are strings; 0x0A is the tag for
+    # string_value (field 1, length-delimited), so peek it and skip the
+    # generic field walk.
+    if data and data[0] == 0x0A:
+        length, pos = _read_varint(data, 1)
+        if pos + length == len(data):
+            return data[pos : pos + length].decode("utf-8", errors="replace")
     for field, wtype, val, _ in _parse_message(data):
         if field == _VALUE_STRING:
             return val.decode("utf-8", errors="replace")
         elif field == _VALUE_FLOAT:
-            return val
+            return struct.unpack("<f", val)[0]
         elif field == _VALUE_DOUBLE:
-            return val
+            return struct.unpack("<d", val)[0]
         elif field == _VALUE_INT:
             return val
         elif field == _VALUE_UINT:
@@ -241,8 +327,13 @@ def _decode_value(data):
     return None
 
 
-def _decode_feature(data, keys, values, extent, y_coord_down):
-    """Decode a single Feature message."""
+def _decode_feature(data, keys, values, feature_filter=None):
+    """Decode a single Feature message.
+
+    Returns None when ``feature_filter`` rejects the feature's properties;
+    geometry decoding (the expensive part) is deferred until the filter
+    has passed.
+    """
     geom_type = _GEOM_POINT
     geom_data = b""
     tags_raw = b""
@@ -258,14 +349,12 @@ def _decode_feature(data, keys, values, extent, y_coord_down):
 
     # Decode tags (alternating key/value indices)
     if tags_raw:
-        tag_indices = _decode_packed_uint32(tags_raw)
-        for i in range(0, len(tag_indices) - 1, 2):
-            ki = tag_indices[i]
-            vi = tag_indices[i + 1]
-            if ki < len(keys) and vi < len(values):
-                properties[keys[ki]] = values[vi]
+        _decode_tags(tags_raw, keys, values, properties)
 
-    geometry = _decode_geometry(geom_data, geom_type, extent, y_coord_down)
+    if feature_filter is not None and not feature_filter(properties):
+        return None
+
+    geometry = _decode_geometry(geom_data, geom_type)
 
     return {
         "geometry": geometry,
@@ -273,7 +362,23 @@ def _decode_feature(data, keys, values, extent, y_coord_down):
     }
 
 
-def _decode_layer(data, y_coord_down):
+def _peek_layer_name(data):
+    """Return the layer name without decoding the layer.
+
+    Per the MVT spec the name field leads the Layer message; returns None
+    if it does not, in which case the caller must decode fully.
+    """
+    try:
+        tag, pos = _read_varint(data, 0)
+        if tag >> 3 == _LAYER_NAME and tag & 0x07 == 2:
+            length, pos = _read_varint(data, pos)
+            return data[pos : pos + length].decode("utf-8", errors="replace")
+    except ValueError:
+        pass
+    return None
+
+
+def _decode_layer(data, feature_filter=None):
     """Decode a single Layer message."""
     name = ""
     keys = []
@@ -294,33 +399,44 @@ def _decode_layer(data, y_coord_down):
             feature_datas.append(val)
 
     features = [
-        _decode_feature(fd, keys, values, extent, y_coord_down)
+        feature
         for fd in feature_datas
+        for feature in (_decode_feature(fd, keys, values, feature_filter),)
+        if feature is not None
     ]
 
     return name, {"extent": extent, "features": features}
 
 
-def decode(tile_bytes, default_options=None):
+def decode(tile_bytes, layers=None, feature_filter=None):
     """
     Decode MVT tile bytes into a dict of layers.
 
-    Compatible with ``mapbox_vector_tile.decode()`` API.
-    
+    Geometry Y always increases downward (the tile's native encoding);
+    the GeoJSON-style up-flip was unused and has been dropped.
+
     Options:
-        y_coord_down (bool): If True, keep Y pointing down (default True).
+        layers: optional collection of layer names; layers outside it are
+            skipped without being decoded.
+        feature_filter: optional predicate over a feature's properties
+            dict; features it rejects skip geometry decoding entirely.
     """
-    if default_options is None:
-        default_options = {}
-    y_coord_down = default_options.get("y_coord_down", True)
-
     result = {}
-    buf = bytes(tile_bytes) if not isinstance(tile_bytes, (bytes, bytearray)) else tile_bytes
+    # mmap supports the indexing and slicing the parser needs, so mapped
+    # cache files are parsed in place without a bytes copy.
+    if isinstance(tile_bytes, (bytes, bytearray, mmap.mmap)):
+        buf = tile_bytes
+    else:
+        buf = bytes(tile_bytes)
 
     for field, wtype, val, _ in _parse_message(buf):
         if field == _TILE_LAYER and wtype == 2:
-            name, layer = _decode_layer(val, y_coord_down)
-            if name:
+            if layers is not None:
+                peeked = _peek_layer_name(val)
+                if peeked is not None and peeked not in layers:
+                    continue
+            name, layer = _decode_layer(val, feature_filter)
+            if name and (layers is None or name in layers):
                 result[name] = layer
 
     return result
@@ -1,31 +1,172 @@
+def _clip_segment(x0, y0, x1, y1, width, height):
+    """Cohen-Sutherland clip of a segment to [0, width) x [0, height).
+
+    Returns clipped integer endpoints, or None when the segment lies
+    entirely outside the framebuffer.
+    """
+    xmax = width - 1
+    ymax = height - 1
+
+    def outcode(x, y):
+        code = 0
+        if x < 0:
+            code |= 1
+        elif x > xmax:
+            code |= 2
+        if y < 0:
+            code |= 4
+        elif y > ymax:
+            code |= 8
+        return code
+
+    c0 = outcode(x0, y0)
+    c1 = outcode(x1, y1)
+    while True:
+        if not (c0 | c1):
+            return int(x0), int(y0), int(x1), int(y1)
+        if c0 & c1:
+            return None
+        c = c0 or c1
+        if c & 8:
+            x = x0 + (x1 - x0) * (ymax - y0) / (y1 - y0)
+            y = ymax
+        elif c & 4:
+            x = x0 + (x1 - x0) * (0 - y0) / (y1 - y0)
+            y = 0
+        elif c & 2:
+            y = y0 + (y1 - y0) * (xmax - x0) / (x1 - x0)
+            x = xmax
+        else:
+            y = y0 + (y1 - y0) * (0 - x0) / (x1 - x0)
+            x = 0
+        if c == c0:
+            x0, y0, c0 = x, y, outcode(x, y)
+        else:
+            x1, y1, c1 = x, y, outcode(x, y)
+
+
 class Framebuffer:
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.buffer = [[' ' for _ in range(width)] for _ in range(height)]
-        self.colors = [[0 for _ in range(width)] for _ in range(height)]
-    
+        # One contiguous bytearray for the character grid (row-major);
+        # row extraction and run fills become single C-level operations.
+        self.buffer = bytearray(b" " * (width * height))
+        # Colors share the same flat row-major layout so runs and clears
+        # are single slice assignments rather than nested list walks.
+        self.colors = [0] * (width * height)
+        # Dirty bounding box of writes since the last clear; clear() only
+        # touches this rectangle, so a reused framebuffer pays for what
+        # was drawn, not for the whole grid. Sentinel: x0 > x1 == clean.
+        self._dirty_x0 = width
+        self._dirty_y0 = height
+        self._dirty_x1 = -1
+        self._dirty_y1 = -1
+
+    def _mark(self, x0, y0, x1, y1):
+        """Grow the dirty box; expects in-bounds coords with x0<=x1, y0<=y1."""
+        if x0 < self._dirty_x0:
+            self._dirty_x0 = x0
+        if y0 < self._dirty_y0:
+            self._dirty_y0 = y0
+        if x1 > self._dirty_x1:
+            self._dirty_x1 = x1
+        if y1 > self._dirty_y1:
+            self._dirty_y1 = y1
+
     def clear(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                self.buffer[y][x] = ' '
-                self.colors[y][x] = 0
-                
+        x0 = self._dirty_x0
+        x1 = self._dirty_x1
+        if x0 > x1:
+            return  # nothing drawn since the last clear
+        width = self.width
+        y0 = self._dirty_y0
+        y1 = self._dirty_y1
+        if x0 == 0 and x1 == width - 1:
+            # Full-width box: wipe the row span in two slice stores.
+            start = y0 * width
+            stop = (y1 + 1) * width
+            self.buffer[start:stop] = b" " * (stop - start)
+            self.colors[start:stop] = [0] * (stop - start)
+        else:
+            span = x1 - x0 + 1
+            blank = b" " * span
+            zeros = [0] * span
+            for y in range(y0, y1 + 1):
+                base = y * width
+                self.buffer[base + x0 : base + x1 + 1] = blank
+                self.colors[base + x0 : base + x1 + 1] = zeros
+        self._dirty_x0 = width
+        self._dirty_y0 = self.height
+        self._dirty_x1 = -1
+        self._dirty_y1 = -1
+
     def set_char(self, x, y, char, color=0):
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.buffer[y][x] = char
-            self.colors[y][x] = color
+            idx = y * self.width + x
+            self.buffer[idx] = ord(char)
+            self.colors[idx] = color
+            self._mark(x, y, x, y)
 
     def draw_line(self, x0, y0, x1, y1, char, color=0):
-        """Bresenham's Line Algorithm"""
+        """Bresenham's Line Algorithm with axis-aligned fast paths."""
+        if y0 == y1:
+            # Horizontal run: one slice write instead of per-pixel calls.
+            if 0 <= y0 < self.height:
+                xa, xb = (x0, x1) if x0 <= x1 else (x1, x0)
+                xa = max(0, xa)
+                xb = min(self.width - 1, xb)
+                if xa <= xb:
+                    run = xb - xa + 1
+                    base = y0 * self.width
+                    self.buffer[base + xa : base + xb + 1] = bytes([ord(char)]) * run
+                    self.colors[base + xa : base + xb + 1] = [color] * run
+                    self._mark(xa, y0, xb, y0)
+            return
+        if x0 == x1:
+            if 0 <= x0 < self.width:
+                ya, yb = (y0, y1) if y0 <= y1 else (y1, y0)
+                ya = max(0, ya)
+                yb = min(self.height - 1, yb)
+                buffer = self.buffer
+                colors = self.colors
+                width = self.width
+                code = ord(char)
+                for y in range(ya, yb + 1):
+                    idx = y * width + x0
+                    buffer[idx] = code
+                    colors[idx] = color
+                if ya <= yb:
+                    self._mark(x0, ya, x0, yb)
+            return
+
         dx = abs(x1 - x0)
         dy = abs(y1 - y0)
         sx = 1 if x0 < x1 else -1
         sy = 1 if y0 < y1 else -1
         err = dx - dy
-        
+        # Everything the per-pixel loop touches is bound to locals and the
+        # bounds check is inlined; a method call per pixel roughly doubles
+        # the cost of this loop.
+        width = self.width
+        height = self.height
+        buffer = self.buffer
+        colors = self.colors
+        code = ord(char)
+        # The endpoints bound every pixel Bresenham touches; clamping them
+        # to the grid over-approximates the dirty region at worst.
+        self._mark(
+            max(0, min(x0, x1)),
+            max(0, min(y0, y1)),
+            min(width - 1, max(x0, x1)),
+            min(height - 1, max(y0, y1)),
+        )
+
         while True:
-            self.set_char(x0, y0, char, color)
+            if 0 <= x0 < width and 0 <= y0 < height:
+                idx = y0 * width + x0
+                buffer[idx] = code
+                colors[idx] = color
             if x0 == x1 and y0 == y1:
                 break
             e2 = 2 * err
@@ -45,45 +186,169 @@ class Framebuffer:
         if not rings:
             return
 
-        valid_rings = [ring for ring in rings if len(ring) >= 3]
-        if not valid_rings:
+        height = self.height
+        width = self.width
+        # Edge table built once per polygon: every non-horizontal edge is
+        # bucketed by the first scanline it crosses, so each scanline only
+        # visits the edges that actually span it instead of re-testing
+        # every edge of every ring.
+        buckets = {}
+        last_y = -1
+        for ring in rings:
+            if len(ring) < 3:
+                continue
+            xj, yj = ring[-1]
+            for xi, yi in ring:
+                if yi != yj:
+                    ylo = yi if yi < yj else yj
+                    yhi = yj if yi < yj else yi
+                    # Scanline indices and bucket keys must be ints, but
+                    # vertices may arrive as floats; cast the bounds like
+                    # the pre-edge-table fill did (the crossing math
+                    # below keeps the original coordinates).
+                    ylo = int(ylo)
+                    yhi = int(yhi)
+                    if yhi >= 0 and ylo + 1 < height:
+                        y_first = ylo + 1 if ylo >= 0 else 0
+                        buckets.setdefault(y_first, []).append(
+                            (yhi, xi, yi, yj - yi, xj - xi)
+                        )
+                        if yhi > last_y:
+                            last_y = yhi
+                xj, yj = xi, yi
+        if not buckets:
             return
 
-        min_y = min(int(p[1]) for ring in valid_rings for p in ring)
-        max_y = max(int(p[1]) for ring in valid_rings for p in ring)
-        min_y = max(0, min_y)
-        max_y = min(self.height - 1, max_y)
-
-        for y in range(min_y, max_y + 1):
+        char_byte = bytes([ord(char)])
+        buffer = self.buffer
+        colors = self.colors
+        active = []
+        dirty_x0 = width
+        dirty_y0 = height
+        dirty_x1 = -1
+        dirty_y1 = -1
+        last_y = min(height - 1, last_y)
+        for y in range(min(buckets), last_y + 1):
+            added = buckets.get(y)
+            if added:
+                active.extend(added)
+            if not active:
+                continue
             nodes = []
-            for ring in valid_rings:
-                j = len(ring) - 1
-                for i in range(len(ring)):
-                    xi, yi = ring[i]
-                    xj, yj = ring[j]
-                    if (yi < y and yj >= y) or (yj < y and yi >= y):
-                        x = xi + (y - yi) / (yj - yi) * (xj - xi)
-                        nodes.append(int(x))
-                    j = i
+            still_active = []
+            for edge in active:
+                yhi, xi, yi, dy, dx = edge
+                nodes.append(int(xi + (y - yi) / dy * dx))
+                if y < yhi:
+                    still_active.append(edge)
+            active = still_active
 
             nodes.sort()
-            for i in range(0, len(nodes), 2):
-                if i + 1 >= len(nodes):
-                    break
+            base = y * width
+            for i in range(0, len(nodes) - 1, 2):
                 x_start = max(0, nodes[i])
-                x_end = min(self.width - 1, nodes[i + 1])
-                for x in range(x_start, x_end + 1):
-                    self.buffer[y][x] = char
-                    self.colors[y][x] = color
+                x_end = min(width - 1, nodes[i + 1])
+                if x_end < x_start:
+                    continue
+                run = x_end - x_start + 1
+                buffer[base + x_start : base + x_end + 1] = char_byte * run
+                colors[base + x_start : base + x_end + 1] = [color] * run
+                if x_start < dirty_x0:
+                    dirty_x0 = x_start
+                if x_end > dirty_x1:
+                    dirty_x1 = x_end
+                if y < dirty_y0:
+                    dirty_y0 = y
+                dirty_y1 = y
+        if dirty_x1 >= dirty_x0:
+            self._mark(dirty_x0, dirty_y0, dirty_x1, dirty_y1)
 
     def draw_poly_outline(self, points, char, color=0):
+        """Stroke a polyline segment by segment with the rasterizer inlined.
+
+        Dense rings hit this with thousands of edges per frame, so all
+        state stays in locals for the whole polyline and each clipped
+        segment is rasterized here rather than dispatched to draw_line.
+        Clipped endpoints are already in bounds, which also drops the
+        per-pixel bounds test.
+        """
+        width = self.width
+        height = self.height
+        buffer = self.buffer
+        colors = self.colors
+        code = ord(char)
+        char_byte = bytes((code,))
+        clip = _clip_segment
+        dirty_x0 = width
+        dirty_y0 = height
+        dirty_x1 = -1
+        dirty_y1 = -1
         for i in range(len(points) - 1):
-            x0, y0 = points[i]
-            x1, y1 = points[i+1]
-            self.draw_line(int(x0), int(y0), int(x1), int(y1), char, color)
-            
+            p0 = points[i]
+            p1 = points[i + 1]
+            # Clip in screen space first so Bresenham never steps through
+            # offscreen pixels; tile geometry routinely overshoots the view.
+            clipped = clip(int(p0[0]), int(p0[1]), int(p1[0]), int(p1[1]), width, height)
+            if clipped is None:
+                continue
+            x0, y0, x1, y1 = clipped
+            # Clipped endpoints bound the segment's pixels; fold them into
+            # the per-call dirty box.
+            if x0 < x1:
+                seg_x0, seg_x1 = x0, x1
+            else:
+                seg_x0, seg_x1 = x1, x0
+            if y0 < y1:
+                seg_y0, seg_y1 = y0, y1
+            else:
+                seg_y0, seg_y1 = y1, y0
+            if seg_x0 < dirty_x0:
+                dirty_x0 = seg_x0
+            if seg_y0 < dirty_y0:
+                dirty_y0 = seg_y0
+            if seg_x1 > dirty_x1:
+                dirty_x1 = seg_x1
+            if seg_y1 > dirty_y1:
+                dirty_y1 = seg_y1
+            if y0 == y1:
+                xa, xb = (x0, x1) if x0 <= x1 else (x1, x0)
+                run = xb - xa + 1
+                base = y0 * width
+                buffer[base + xa : base + xb + 1] = char_byte * run
+                colors[base + xa : base + xb + 1] = [color] * run
+                continue
+            if x0 == x1:
+                ya, yb = (y0, y1) if y0 <= y1 else (y1, y0)
+                for y in range(ya, yb + 1):
+                    idx = y * width + x0
+                    buffer[idx] = code
+                    colors[idx] = color
+                continue
+            dx = abs(x1 - x0)
+            dy = abs(y1 - y0)
+            sx = 1 if x0 < x1 else -1
+            sy = 1 if y0 < y1 else -1
+            err = dx - dy
+            while True:
+                idx = y0 * width + x0
+                buffer[idx] = code
+                colors[idx] = color
+                if x0 == x1 and y0 == y1:
+                    break
+                e2 = 2 * err
+                if e2 > -dy:
+                    err -= dy
+                    x0 += sx
+                if e2 < dx:
+                    err += dx
+                    y0 += sy
+        if dirty_x1 >= dirty_x0:
+            self._mark(dirty_x0, dirty_y0, dirty_x1, dirty_y1)
+
     def get_row(self, y):
-        return "".join(self.buffer[y])
+        base = y * self.width
+        return self.buffer[base : base + self.width].decode("latin-1")
 
     def get_row_colors(self, y):
-        return self.colors[y]
+        base = y * self.width
+        return self.colors[base : base + self.width]
@@ -1,3 +1,5 @@
+import collections
+import mmap
 import os
 import concurrent.futures
 import requests
@@ -12,33 +14,63 @@ TILE_URL_TEMPLATE = "https://tiles.openfreemap.org/planet/latest/{z}/{x}/{y}.pbf
 # Try to get token from env (Not needed for OpenFreeMap but kept for compat if we switch back)
 MAPBOX_TOKEN = os.environ.get("MAPBOX_ACCESS_TOKEN", "")
 
+# Cap on decoded tiles kept by TileLoader; above this the least recently
+# used tile is dropped (decoding again is cheaper than growing forever).
+MAX_LOADED_TILES = 256
+
+# One persistent session for all tile fetches: connections (and their TLS
+# handshakes) are reused across tiles instead of re-established per request,
+# and the pool is sized for concurrent fetches from the worker threads.
+_session = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
 def get_tile_path(z, x, y):
     return os.path.join(CACHE_DIR, str(z), str(x), f"{y}.mvt")
 
+def _read_cached_tile(path):
+    """
+    Maps a cached tile into memory; returns a bytes-like object or None.
+    mmap hands the decoder the page cache directly instead of copying the
+    tile into a bytes object first (the decoder indexes and slices, both
+    of which mmap supports). The mapping outlives the closed fd. Empty
+    files from aborted writes decode as blank tiles, so they count as
+    missing and are removed.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            pass  # zero-length file
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return None
+
 def fetch_tile(z, x, y):
     """
-    Returns tile bytes. Checks cache first, then downloads.
+    Returns tile bytes (bytes-like; cached tiles come back memory-mapped).
+    Checks cache first, then downloads.
     """
     path = get_tile_path(z, x, y)
-    
-    if os.path.exists(path):
-        # Guard against previously cached empty files; they decode as blank tiles.
-        if os.path.getsize(path) == 0:
-            try:
-                os.remove(path)
-            except OSError:
-                pass
-        else:
-            with open(path, "rb") as f:
-                return f.read()
-            
+
+    cached = _read_cached_tile(path)
+    if cached is not None:
+        return cached
+
     # Download
     # if not MAPBOX_TOKEN:
     #     return None # Graceful fail for MVP if no token
         
     url = TILE_URL_TEMPLATE.format(z=z, x=x, y=y, token=MAPBOX_TOKEN)
     try:
-        resp = requests.get(url, timeout=5) # Increased timeout
+        resp = _session.get(url, timeout=5) # Increased timeout
         if resp.status_code == 200:
             if not resp.content:
                 return None
@@ -55,6 +87,19 @@ def fetch_tile(z, x, y):
         
     return None
 
+# Layers the renderer actually draws; anything else in a tile is skipped
+# at decode time (see mvt_decoder.decode's layers option).
+RENDERED_LAYERS = frozenset({
+    "water",
+    "waterway",
+    "landuse",
+    "landcover",
+    "building",
+    "road",
+    "transportation",
+    "transportation_name",
+})
+
 def decode_tile(tile_bytes, z, x, y):
     """
     Decodes MVT bytes into a dictionary of features.
@@ -62,9 +107,10 @@ def decode_tile(tile_bytes, z, x, y):
     if not tile_bytes:
         return {}
     try:
-        # Vector tiles are encoded with Y increasing downward from the tile origin.
-        # Keep that orientation so decoded geometry aligns with world/tile pixel math.
-        decoded = mvt_decoder.decode(tile_bytes, default_options={"y_coord_down": True})
+        # Vector tiles are encoded with Y increasing downward from the tile
+        # origin; the decoder keeps that orientation so geometry aligns with
+        # world/tile pixel math.
+        decoded = mvt_decoder.decode(tile_bytes, layers=RENDERED_LAYERS)
         return decoded
     except Exception:
         return {}
@@ -73,7 +119,15 @@ class TileLoader:
     def __init__(self):
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
         self.futures = {} # (z,x,y) -> future
-        self.loaded = {} # (z,x,y) -> decoded_data
+        self.loaded = collections.OrderedDict() # (z,x,y) -> decoded_data, LRU order
+        self._decode_pool = None # created on first use; workers are not free
+
+    def _get_decode_pool(self):
+        if self._decode_pool is None:
+            self._decode_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2
+            )
+        return self._decode_pool
         
     def request_tile(self, z, x, y):
         key = (z, x, y)
@@ -83,24 +137,31 @@ class TileLoader:
             return # Already fetching
             
         # Check cache synchronously first (fast I/O)
-        path = get_tile_path(z, x, y)
-        if os.path.exists(path):
-            try:
-                with open(path, "rb") as f:
-                    raw = f.read()
-                self.loaded[key] = decode_tile(raw, z, x, y)
-                return
-            except Exception:
-                pass
+        raw = _read_cached_tile(get_tile_path(z, x, y))
+        if raw is not None:
+            self._store(key, decode_tile(raw, z, x, y))
+            return
         
         # If not in cache, submit to thread pool
         self.futures[key] = self.executor.submit(self._fetch_and_decode, z, x, y)
+
+    def _store(self, key, decoded):
+        self.loaded[key] = decoded
+        self.loaded.move_to_end(key)
+        while len(self.loaded) > MAX_LOADED_TILES:
+            self.loaded.popitem(last=False)
         
     def _fetch_and_decode(self, z, x, y):
         raw = fetch_tile(z, x, y)
-        if raw:
+        if not raw:
+            return {}
+        # Fetching is I/O and stays on this thread; the MVT parse is pure
+        # CPU, so hand it to a process pool where it runs GIL-free. Fall
+        # back to decoding in-process if worker processes are unavailable.
+        try:
+            return self._get_decode_pool().submit(decode_tile, raw, z, x, y).result()
+        except Exception:
             return decode_tile(raw, z, x, y)
-        return {}
 
     def update(self):
         """Check for completed futures"""
@@ -110,16 +171,23 @@ class TileLoader:
             if future.done():
                 try:
                     result = future.result()
-                    self.loaded[key] = result
+                    self._store(key, result)
                 except Exception as e:
                     pass # Log?
                 del self.futures[key]
 
     def get_tile(self, z, x, y):
-        return self.loaded.get((z, x, y))
+        tile = self.loaded.get((z, x, y))
+        if tile is not None:
+            # Refresh recency so tiles still in the viewport survive eviction.
+            self.loaded.move_to_end((z, x, y))
+        return tile
         
     def clear(self):
         self.executor.shutdown(wait=False)
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        if self._decode_pool is not None:
+            self._decode_pool.shutdown(wait=False)
+            self._decode_pool = None
         self.futures = {}
-        self.loaded = {}
+        self.loaded = collections.OrderedDict()
@@ -1,8 +1,15 @@
-import json
+import concurrent.futures
+import functools
+import gzip
+import hashlib
+import os
+import re
+import socket
+import string
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qsl, urlparse
 
-from maps import ascii_map
+from maps import ascii_map, coords
 
 START_LAT = 43.6446
 START_LON = -79.3849
@@ -13,7 +20,11 @@ START_CELL_ASPECT = 0.6
 HOST = "127.0.0.1"
 PORT = 8000
 
-HTML = """<!doctype html>
+# Substituted once at import via string.Template: unlike %-formatting,
+# Template leaves literal "%" (CSS units, gradients) and "{}" (CSS and
+# JS blocks) alone, so nothing in the page needs escape doubling and the
+# build is a single scan for the eight $placeholders.
+HTML = string.Template("""<!doctype html>
 <html lang="en">
 <head>
   <meta charset="utf-8" />
@@ -31,7 +42,7 @@ HTML = """<!doctype html>
     * { box-sizing: border-box; }
     body {
       margin: 0;
-      background: radial-gradient(1200px 600px at 20%% -10%%, #202020, var(--bg));
+      background: radial-gradient(1200px 600px at 20% -10%, #202020, var(--bg));
       color: var(--text);
       font-family: "IBM Plex Mono", "Menlo", "Consolas", monospace;
       min-height: 100vh;
@@ -40,7 +51,7 @@ HTML = """<!doctype html>
     }
     .bar {
       border-bottom: 1px solid var(--border);
-      background: color-mix(in oklab, var(--panel) 92%%, black);
+      background: color-mix(in oklab, var(--panel) 92%, black);
       padding: 10px;
       display: flex;
       flex-wrap: wrap;
@@ -79,7 +90,7 @@ HTML = """<!doctype html>
       border-radius: 8px;
       padding: 10px;
       display: inline-block;
-      min-width: 100%%;
+      min-width: 100%;
     }
     .status {
       color: var(--muted);
@@ -104,7 +115,7 @@ HTML = """<!doctype html>
     <button data-action="reset">Reset</button>
     <input id="lat" title="latitude" />
     <input id="lon" title="longitude" />
-    <input id="zoom" title="zoom" type="number" step="1" min="%(min_zoom)s" max="%(max_zoom)s" />
+    <input id="zoom" title="zoom" type="number" step="1" min="$min_zoom" max="$max_zoom" />
     <input id="width" title="cols" />
     <input id="height" title="rows" />
     <input id="aspect" title="cell aspect" />
@@ -114,21 +125,20 @@ HTML = """<!doctype html>
   </div>
   <div id="mapWrap" class="map-wrap"><pre id="map">Loading...</pre></div>
   <script>
-    const MIN_ZOOM = %(min_zoom)s;
-    const MAX_ZOOM = %(max_zoom)s;
-    const MAX_ACTION_QUEUE = 32;
+    const MIN_ZOOM = $min_zoom;
+    const MAX_ZOOM = $max_zoom;
     const WHEEL_ZOOM_THRESHOLD = 40;
-    const WHEEL_ZOOM_TICK_MS = 35;
 
     const state = {
-      lat: %(lat)s,
-      lon: %(lon)s,
-      zoom: %(zoom)s,
-      width: %(width)s,
-      height: %(height)s,
-      cell_aspect: %(cell_aspect)s,
+      lat: $lat,
+      lon: $lon,
+      zoom: $zoom,
+      width: $width,
+      height: $height,
+      cell_aspect: $cell_aspect,
       inFlight: false,
-      queuedActions: []
+      queuedDelta: { dx: 0, dy: 0, dz: 0 },
+      queuedAction: null
     };
 
     const el = {
@@ -144,6 +154,13 @@ HTML = """<!doctype html>
       apply: document.getElementById("apply")
     };
 
+    // One Text node reused for every frame: assigning its .data swaps
+    // the characters in place, where setting textContent would tear
+    // down and recreate the child node on each keystroke.
+    el.mapText = document.createTextNode(el.map.textContent);
+    el.map.textContent = "";
+    el.map.appendChild(el.mapText);
+
     function clamp(value, min, max) {
       return Math.min(max, Math.max(min, value));
     }
@@ -176,11 +193,28 @@ HTML = """<!doctype html>
     }
 
     function enqueueAction(action) {
-      if (state.queuedActions.length >= MAX_ACTION_QUEUE) {
-        state.queuedActions[state.queuedActions.length - 1] = action;
-        return;
+      // Actions arriving while a request is in flight coalesce into net
+      // deltas; one follow-up request renders the final state.
+      const d = state.queuedDelta;
+      if (action === "up") d.dy -= 1;
+      else if (action === "down") d.dy += 1;
+      else if (action === "left") d.dx -= 1;
+      else if (action === "right") d.dx += 1;
+      else if (action === "zoom_in") d.dz += 1;
+      else if (action === "zoom_out") d.dz -= 1;
+      else if (action === "reset") {
+        d.dx = 0;
+        d.dy = 0;
+        d.dz = 0;
+        state.queuedAction = "reset";
+      } else {
+        state.queuedAction = "";
       }
-      state.queuedActions.push(action);
+    }
+
+    function hasQueuedWork() {
+      const d = state.queuedDelta;
+      return state.queuedAction !== null || d.dx !== 0 || d.dy !== 0 || d.dz !== 0;
     }
 
     function queueRender(action = "") {
@@ -193,7 +227,7 @@ HTML = """<!doctype html>
       render(action);
     }
 
-    async function render(action = "") {
+    async function render(action = "", delta = null) {
       state.inFlight = true;
       el.status.textContent = "rendering...";
       try {
@@ -206,24 +240,35 @@ HTML = """<!doctype html>
           cell_aspect: String(state.cell_aspect),
           action
         });
+        if (delta) {
+          if (delta.dx) query.set("pan_dx", String(delta.dx));
+          if (delta.dy) query.set("pan_dy", String(delta.dy));
+          if (delta.dz) query.set("zoom_delta", String(delta.dz));
+        }
         const res = await fetch("/api/render?" + query.toString());
-        const data = await res.json();
-        state.lat = data.lat;
-        state.lon = data.lon;
-        state.zoom = clamp(data.zoom, MIN_ZOOM, MAX_ZOOM);
-        state.width = data.width;
-        state.height = data.height;
-        state.cell_aspect = data.cell_aspect;
-        el.map.textContent = data.text;
-        el.status.textContent = "lat " + data.lat.toFixed(5) + " lon " + data.lon.toFixed(5) + " z " + data.zoom;
+        const text = await res.text();
+        state.lat = parseNumber(res.headers.get("x-map-lat"), state.lat);
+        state.lon = parseNumber(res.headers.get("x-map-lon"), state.lon);
+        state.zoom = clamp(parseNumber(res.headers.get("x-map-zoom"), state.zoom), MIN_ZOOM, MAX_ZOOM);
+        state.width = parseNumber(res.headers.get("x-map-width"), state.width);
+        state.height = parseNumber(res.headers.get("x-map-height"), state.height);
+        state.cell_aspect = parseNumber(res.headers.get("x-map-aspect"), state.cell_aspect);
+        el.mapText.data = text;
+        el.status.textContent = "lat " + state.lat.toFixed(5) + " lon " + state.lon.toFixed(5) + " z " + state.zoom;
         syncInputs();
       } catch (err) {
         el.status.textContent = "error";
       } finally {
         state.inFlight = false;
-        if (state.queuedActions.length > 0) {
-          const nextAction = state.queuedActions.shift();
-          queueRender(nextAction);
+        if (hasQueuedWork()) {
+          const d = state.queuedDelta;
+          const nextDelta = { dx: d.dx, dy: d.dy, dz: d.dz };
+          const nextAction = state.queuedAction || "";
+          state.queuedAction = null;
+          d.dx = 0;
+          d.dy = 0;
+          d.dz = 0;
+          render(nextAction, nextDelta);
         }
       }
     }
@@ -275,26 +320,34 @@ HTML = """<!doctype html>
     }, { passive: false });
 
     let wheelDelta = 0;
-    let wheelTimer = null;
+    let wheelRAF = null;
 
-    function flushWheelZoom() {
-      if (Math.abs(wheelDelta) < WHEEL_ZOOM_THRESHOLD) {
-        clearInterval(wheelTimer);
-        wheelTimer = null;
-        wheelDelta = 0;
+    function queueZoomDelta(dz) {
+      if (!dz) return;
+      readInputs();
+      if (state.inFlight) {
+        state.queuedDelta.dz += dz;
         return;
       }
+      render("", { dx: 0, dy: 0, dz });
+    }
 
-      const action = wheelDelta > 0 ? "zoom_out" : "zoom_in";
-      wheelDelta += wheelDelta > 0 ? -WHEEL_ZOOM_THRESHOLD : WHEEL_ZOOM_THRESHOLD;
-      handleAction(action);
+    function flushWheelZoom() {
+      // Runs on a frame boundary: accumulated wheel movement becomes one
+      // net zoom delta and at most one request per displayed frame. No
+      // timer ticks while the wheel is idle; leftover sub-threshold
+      // movement waits for the next wheel event.
+      wheelRAF = null;
+      const ticks = Math.trunc(wheelDelta / WHEEL_ZOOM_THRESHOLD);
+      wheelDelta -= ticks * WHEEL_ZOOM_THRESHOLD;
+      queueZoomDelta(-ticks);
     }
 
     el.mapWrap.addEventListener("wheel", (ev) => {
       ev.preventDefault();
       wheelDelta += ev.deltaY;
-      if (!wheelTimer) {
-        wheelTimer = setInterval(flushWheelZoom, WHEEL_ZOOM_TICK_MS);
+      if (!wheelRAF) {
+        wheelRAF = requestAnimationFrame(flushWheelZoom);
       }
     }, { passive: false });
 
@@ -303,98 +356,369 @@ HTML = """<!doctype html>
   </script>
 </body>
 </html>
-""" % {
-    "lat": START_LAT,
-    "lon": START_LON,
-    "zoom": START_ZOOM,
-    "min_zoom": ascii_map.MIN_ZOOM,
-    "max_zoom": ascii_map.MAX_ZOOM,
-    "width": START_WIDTH,
-    "height": START_HEIGHT,
-    "cell_aspect": START_CELL_ASPECT,
+""").substitute(
+    lat=START_LAT,
+    lon=START_LON,
+    zoom=START_ZOOM,
+    min_zoom=ascii_map.MIN_ZOOM,
+    max_zoom=ascii_map.MAX_ZOOM,
+    width=START_WIDTH,
+    height=START_HEIGHT,
+    cell_aspect=START_CELL_ASPECT,
+)
+
+# The page is immutable for the process lifetime: encode and compress it
+# once at import instead of per GET /. The 404 body stays identity-encoded
+# (gzip would make those nine bytes bigger).
+HTML_BYTES = HTML.encode("utf-8")
+HTML_GZIP = gzip.compress(HTML_BYTES, compresslevel=9)
+HTML_ETAG = '"' + hashlib.sha256(HTML_BYTES).hexdigest()[:16] + '"'
+NOT_FOUND_BODY = b"Not found"
+
+# Identity-encoded page responses go out via sendfile from an anonymous
+# in-memory file: the kernel moves the bytes to the socket directly,
+# skipping the userspace copy a write would make. Platforms without
+# memfd_create fall back to writing a memoryview.
+HTML_MEMFD = None
+if hasattr(os, "memfd_create"):
+    HTML_MEMFD = os.memfd_create("ascii-map-html")
+    os.write(HTML_MEMFD, HTML_BYTES)
+
+
+# Accepted by float() minus the inf/nan spellings, which would poison
+# the view state. Matching up front keeps field parsing exception-free.
+_FLOAT_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\Z")
+
+
+def _float_field(query, name, default):
+    raw = query.get(name)
+    if raw is None:
+        return default
+    return float(raw) if _FLOAT_RE.match(raw) else default
+
+
+def _int_field(query, name, default):
+    raw = query.get(name)
+    if raw is None:
+        return default
+    body = raw[1:] if raw[:1] in "+-" else raw
+    return int(raw) if body.isdigit() else default
+
+
+def _pan_action(direction):
+    def apply_pan(lat, lon, zoom, cell_aspect):
+        lat, lon = ascii_map.pan(lat, lon, zoom, direction, cell_aspect=cell_aspect)
+        return lat, lon, zoom
+
+    return apply_pan
+
+
+# Action dispatch table: one dict lookup instead of walking an if/elif
+# chain of string comparisons per request. Every handler maps the
+# current (lat, lon, zoom, cell_aspect) to a new (lat, lon, zoom).
+_ACTIONS = {
+    "reset": lambda lat, lon, zoom, cell_aspect: (START_LAT, START_LON, START_ZOOM),
+    "zoom_in": lambda lat, lon, zoom, cell_aspect: (
+        lat,
+        lon,
+        min(zoom + 1, ascii_map.MAX_ZOOM),
+    ),
+    "zoom_out": lambda lat, lon, zoom, cell_aspect: (
+        lat,
+        lon,
+        max(zoom - 1, ascii_map.MIN_ZOOM),
+    ),
+    "up": _pan_action("up"),
+    "down": _pan_action("down"),
+    "left": _pan_action("left"),
+    "right": _pan_action("right"),
 }
 
 
-def _float_arg(query, name, default):
-    try:
-        return float(query.get(name, [default])[0])
-    except (TypeError, ValueError):
-        return float(default)
-
-
-def _int_arg(query, name, default):
-    try:
-        return int(query.get(name, [default])[0])
-    except (TypeError, ValueError):
-        return int(default)
-
-
-def render_payload(query):
-    lat = _float_arg(query, "lat", START_LAT)
-    lon = _float_arg(query, "lon", START_LON)
-    zoom = _int_arg(query, "zoom", START_ZOOM)
+def resolve_view(query):
+    """Apply the requested action to the incoming view state.
+
+    query is a plain dict of string parameters. Returns the canonical
+    (lat, lon, zoom, width, height, cell_aspect) to render; all the
+    cache-unfriendly work (query parsing, pan/zoom resolution) happens
+    here, before the render cache key is built. Fields are validated
+    with string checks instead of try/except, and each malformed field
+    falls back to its own default without disturbing the others.
+    """
+    lat = _float_field(query, "lat", START_LAT)
+    lon = _float_field(query, "lon", START_LON)
+    zoom = _int_field(query, "zoom", START_ZOOM)
+    width = _int_field(query, "width", START_WIDTH)
+    height = _int_field(query, "height", START_HEIGHT)
+    cell_aspect = _float_field(query, "cell_aspect", START_CELL_ASPECT)
+    zoom_delta = _int_field(query, "zoom_delta", 0)
+    pan_dx = _int_field(query, "pan_dx", 0)
+    pan_dy = _int_field(query, "pan_dy", 0)
+    # Clamp coordinates to the projection's range before anything
+    # downstream rounds or divides them: float("1e999") parses to inf,
+    # which survives the format check but cannot become a cache key.
+    # Same spirit as the size caps below.
+    lat = max(-coords.MAX_LATITUDE, min(lat, coords.MAX_LATITUDE))
+    lon = max(-180.0, min(lon, 180.0))
+    # Bound the coalesced deltas too; an arbitrary-precision int from
+    # the query would overflow the pan's float math long before these
+    # limits mean anything to a real session.
+    zoom_delta = max(-64, min(zoom_delta, 64))
+    pan_dx = max(-10000, min(pan_dx, 10000))
+    pan_dy = max(-10000, min(pan_dy, 10000))
     zoom = max(ascii_map.MIN_ZOOM, min(zoom, ascii_map.MAX_ZOOM))
-    width = _int_arg(query, "width", START_WIDTH)
-    height = _int_arg(query, "height", START_HEIGHT)
-    cell_aspect = _float_arg(query, "cell_aspect", START_CELL_ASPECT)
-    action = query.get("action", [""])[0]
-
-    if action == "reset":
-        lat = START_LAT
-        lon = START_LON
-        zoom = START_ZOOM
-    elif action == "zoom_in":
-        zoom = min(zoom + 1, ascii_map.MAX_ZOOM)
-    elif action == "zoom_out":
-        zoom = max(zoom - 1, ascii_map.MIN_ZOOM)
-    elif action in {"up", "down", "left", "right"}:
-        lat, lon = ascii_map.pan(lat, lon, zoom, action, cell_aspect=cell_aspect)
-
-    return ascii_map.render_ascii(
-        lat=lat,
-        lon=lon,
+    # Cap the frame size and aspect to the renderer's own bounds before
+    # the cache key is built: a hand-written width=10000 query would
+    # otherwise mint a fresh LRU entry (and occupy a render worker) for
+    # every value of a parameter the renderer clamps anyway.
+    width = max(20, min(width, 320))
+    height = max(10, min(height, 140))
+    cell_aspect = max(0.2, min(cell_aspect, 2.0))
+    action = query.get("action", "")
+
+    handler = _ACTIONS.get(action)
+    if handler is not None:
+        lat, lon, zoom = handler(lat, lon, zoom, cell_aspect)
+
+    # Coalesced input: the page batches held-key pans and wheel zooms
+    # into net deltas, so a burst of N actions costs one render of the
+    # final state instead of N round trips.
+    if zoom_delta:
+        zoom = max(ascii_map.MIN_ZOOM, min(zoom + zoom_delta, ascii_map.MAX_ZOOM))
+    if pan_dx or pan_dy:
+        lat, lon = ascii_map.pan_delta(
+            lat, lon, zoom, pan_dx, pan_dy, cell_aspect=cell_aspect
+        )
+
+    return lat, lon, zoom, width, height, cell_aspect
+
+
+def _pool_warmup():
+    # Pay the maps import once per worker at startup instead of on the
+    # first render a worker receives.
+    import maps.ascii_map  # noqa: F401
+
+
+# Rendering is pure Python and CPU-bound, so handler threads would
+# serialize on the GIL; renders run in worker processes instead and N
+# cores serve N clients in parallel. The pool object is cheap to build —
+# workers are only spawned on first submit. The render LRU stays in this
+# process, shared by every client.
+RENDER_POOL = concurrent.futures.ProcessPoolExecutor(
+    max_workers=os.cpu_count() or 2, initializer=_pool_warmup
+)
+RENDER_TIMEOUT = 30.0
+
+
+@functools.lru_cache(maxsize=512)
+def _render_cached(lat_q, lon_q, zoom, width, height, aspect_q):
+    """Render one view; memoized on quantized arguments.
+
+    lat/lon arrive in units of the zoom's quantization step (see
+    _quantize_step) and the aspect in thousandths, so float noise from
+    repeated pans cannot split cache entries. A repeat click (or a
+    second viewer on the same spot) returns the response straight from
+    the LRU.
+
+    Returns (body, gzipped_body, meta_headers): the frame goes over the
+    wire as plain ASCII — no JSON escape pass over ~10KB of newline-heavy
+    text — and the view state rides in X-Map-* headers. The gzipped form
+    is built here (level 1: the grid's tiny alphabet and long runs
+    compress well even at minimum effort) so cache hits never recompress.
+    """
+    step = _quantize_step(zoom)
+    kwargs = dict(
+        lat=lat_q * step,
+        lon=lon_q * step,
         zoom=zoom,
         width=width,
         height=height,
-        cell_aspect=cell_aspect,
+        cell_aspect=aspect_q * 1e-3,
+    )
+    # Render in a worker process; fall back to rendering here if workers
+    # are unavailable (same pattern as the tile decode pool).
+    try:
+        payload = RENDER_POOL.submit(ascii_map.render_ascii, **kwargs).result(
+            timeout=RENDER_TIMEOUT
+        )
+    except Exception:
+        payload = ascii_map.render_ascii(**kwargs)
+    body = payload["text"].encode("ascii")
+    gz_body = gzip.compress(body, compresslevel=1)
+    meta = (
+        ("X-Map-Lat", str(payload["lat"])),
+        ("X-Map-Lon", str(payload["lon"])),
+        ("X-Map-Zoom", str(payload["zoom"])),
+        ("X-Map-Width", str(payload["width"])),
+        ("X-Map-Height", str(payload["height"])),
+        ("X-Map-Aspect", str(payload["cell_aspect"])),
     )
+    return body, gz_body, meta
+
+
+def _quantize_step(zoom):
+    # Grid the coordinates at 1/2^(zoom+8) degrees. That is 360x finer
+    # than a tile pixel (which spans 360 / 2^(zoom+8) degrees of
+    # longitude), so snapping can never blur two visually distinct views
+    # into one key, while still sitting many orders of magnitude above
+    # the FP drift that pans accumulate — which is all the snapping has
+    # to absorb. Scaling with zoom keeps both margins at every level,
+    # where a fixed step could cross one of them.
+    return 1.0 / (1 << (zoom + 8))
+
+
+def _view_key(view):
+    lat, lon, zoom, width, height, cell_aspect = view
+    step = _quantize_step(zoom)
+    return (
+        round(lat / step),
+        round(lon / step),
+        zoom,
+        width,
+        height,
+        round(cell_aspect * 1e3),
+    )
+
+
+# After each response, warm the cache for the six most likely next
+# actions (four pans, two zooms) while the user is thinking; the next
+# click then hits the LRU instead of rendering. Two workers so prefetch
+# never crowds out foreground renders.
+PREFETCH_ACTIONS = ("up", "down", "left", "right", "zoom_in", "zoom_out")
+_prefetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+_prefetch_inflight = set()
+
+
+def _prefetch_neighbors(view):
+    lat, lon, zoom, width, height, cell_aspect = view
+    for action in PREFETCH_ACTIONS:
+        nlat, nlon, nzoom = lat, lon, zoom
+        if action == "zoom_in":
+            nzoom = zoom + 1
+            if nzoom > ascii_map.MAX_ZOOM:
+                continue
+        elif action == "zoom_out":
+            nzoom = zoom - 1
+            if nzoom < ascii_map.MIN_ZOOM:
+                continue
+        else:
+            nlat, nlon = ascii_map.pan(lat, lon, zoom, action, cell_aspect=cell_aspect)
+        key = _view_key((nlat, nlon, nzoom, width, height, cell_aspect))
+        if key in _prefetch_inflight:
+            continue
+        _prefetch_inflight.add(key)
+        try:
+            _render_cached(*key)
+        finally:
+            _prefetch_inflight.discard(key)
+
+
+def render_body(query):
+    view = resolve_view(query)
+    body, gz_body, meta = _render_cached(*_view_key(view))
+    _prefetch_pool.submit(_prefetch_neighbors, view)
+    return body, gz_body, meta
 
 
 class Handler(BaseHTTPRequestHandler):
+    # Persistent connections: a pan/zoom session reuses one TCP
+    # connection instead of paying a handshake per click. Every branch
+    # below sends Content-Length so the client can find message ends.
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # The responses are small; with Nagle on, the kernel may sit on
+        # them for up to ~40ms waiting to coalesce. Send immediately.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     def do_GET(self):
         parsed = urlparse(self.path)
         if parsed.path == "/":
-            body = HTML.encode("utf-8")
+            # The page only changes when the process restarts, so a
+            # matching ETag skips the body entirely on reloads.
+            if self.headers.get("If-None-Match") == HTML_ETAG:
+                self.send_response(304)
+                self.send_header("ETag", HTML_ETAG)
+                self.end_headers()
+                return
+            gzip_ok = "gzip" in self.headers.get("Accept-Encoding", "")
+            body = HTML_GZIP if gzip_ok else HTML_BYTES
             self.send_response(200)
             self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", HTML_ETAG)
+            self.send_header("Cache-Control", "public, max-age=3600, must-revalidate")
+            if gzip_ok:
+                self.send_header("Content-Encoding", "gzip")
             self.send_header("Content-Length", str(len(body)))
             self.end_headers()
-            self.wfile.write(body)
+            if not gzip_ok and HTML_MEMFD is not None:
+                self.wfile.flush()
+                offset = 0
+                length = len(HTML_BYTES)
+                while offset < length:
+                    offset += os.sendfile(
+                        self.connection.fileno(), HTML_MEMFD, offset, length - offset
+                    )
+            else:
+                self.wfile.write(memoryview(body))
             return
 
         if parsed.path == "/api/render":
-            query = parse_qs(parsed.query)
-            payload = render_payload(query)
-            body = json.dumps(payload).encode("utf-8")
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json; charset=utf-8")
-            self.send_header("Cache-Control", "no-store")
-            self.send_header("Content-Length", str(len(body)))
-            self.end_headers()
-            self.wfile.write(body)
+            query = dict(parse_qsl(parsed.query))
+            body, gz_body, meta = render_body(query)
+            gzip_ok = "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzip_ok:
+                body = gz_body
+            # Hot path: assemble status line, headers and body into one
+            # bytes object and write it in a single call. send_response/
+            # send_header would format and buffer each line separately
+            # (plus Date and Server headers nothing consumes).
+            lines = [
+                "HTTP/1.1 200 OK",
+                "Content-Type: text/plain; charset=us-ascii",
+                "Cache-Control: no-store",
+            ]
+            for name, value in meta:
+                lines.append(name + ": " + value)
+            if gzip_ok:
+                lines.append("Content-Encoding: gzip")
+            # handle_one_request already derived close_connection from
+            # the client's request line and Connection header; echo that
+            # decision instead of forcing keep-alive on a client that
+            # asked to close (it would wait for the close forever).
+            lines.append(
+                "Connection: close" if self.close_connection else "Connection: keep-alive"
+            )
+            lines.append("Content-Length: " + str(len(body)))
+            lines.append("\r\n")
+            self.wfile.write("\r\n".join(lines).encode("ascii") + body)
             return
 
         self.send_response(404)
         self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(NOT_FOUND_BODY)))
         self.end_headers()
-        self.wfile.write(b"Not found")
+        self.wfile.write(NOT_FOUND_BODY)
 
     def log_message(self, format, *args):
         return
 
 
+class MapServer(ThreadingHTTPServer):
+    # Handler threads are fire-and-forget: don't track them in a set and
+    # join them on shutdown (block_on_close), and let them die with the
+    # process. Cuts per-connection bookkeeping on a busy map session.
+    daemon_threads = True
+    block_on_close = False
+    allow_reuse_address = True
+    # The stdlib default listen backlog is 5; a burst of tabs or a
+    # held-down key on a laggy link can overflow that and drop SYNs.
+    request_queue_size = 128
+
+
 def main():
-    server = ThreadingHTTPServer((HOST, PORT), Handler)
+    server = MapServer((HOST, PORT), Handler)
     print(f"ASCII map server running at http://{HOST}:{PORT}")
     server.serve_forever()
 